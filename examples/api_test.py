@@ -1,5 +1,6 @@
 import requests
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,6 +9,9 @@ url = "https://api.perplexity.ai/chat/completions"
 
 token = os.environ.get('PPLX_API_KEY')
 
+# Number of requests to send over the same keep-alive connection
+N = 3
+
 payload = {
     "model": "llama-3.1-sonar-small-128k-online",
     "messages": [
@@ -21,11 +25,16 @@ payload = {
         }
     ]
 }
-headers = {
-    "Authorization": f"Bearer {token}",
-    "Content-Type": "application/json"
-}
-
-response = requests.request("POST", url, json=payload, headers=headers)
 
-print(response.text)
+if __name__ == "__main__":
+    # A Session keeps the TLS connection alive, so only the first request pays for the handshake.
+    with requests.Session() as s:
+        s.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        })
+        for _ in range(N):
+            start = time.perf_counter()
+            r = s.post(url, json=payload, timeout=60)
+            print(f"{time.perf_counter() - start:.2f}s")
+            print(r.text)
@@ -6,18 +6,18 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-pplx_ai = Perplexity(
+input_message = "Enter a message. Enter 'exit' to quit: "
+
+with Perplexity(
     api_key=os.environ.get('PPLX_API_KEY'),
     model="llama-3.1-sonar-large-128k-online",
     system_role="You are a helpful assistant.",
-)
-
-input_message = "Enter a message. Enter 'exit' to quit: "
-
-message = input(input_message)
-while message != "exit":
-    print(pplx_ai.chat(message))
+) as pplx_ai:
     message = input(input_message)
+    while message != "exit":
+        for piece in pplx_ai.chat_stream(message):
+            print(piece, end="", flush=True)
+        print()
+        message = input(input_message)
 
-pplx_ai.close()
 print("Goodbye!")
\ No newline at end of file
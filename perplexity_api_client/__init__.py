@@ -1,4 +1,13 @@
 from .perplexity import Perplexity
+from .cache import LLMCache
 from .types import ResponseFormatType
 
-__all__ = ['Perplexity', 'ResponseFormatType']
+__all__ = ['Perplexity', 'AsyncPerplexity', 'LLMCache', 'ResponseFormatType']
+
+
+def __getattr__(name):
+    # aiohttp is an optional extra and slow to import, so the async client is loaded on first use.
+    if name == 'AsyncPerplexity':
+        from .async_perplexity import AsyncPerplexity
+        return AsyncPerplexity
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,273 @@
+"""
+An asyncio Perplexity API client wrapper module for Python.
+"""
+
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+try:
+    import aiohttp
+except ImportError as e:
+    raise ImportError("AsyncPerplexity requires aiohttp: pip install 'perplexity-api-client[aiohttp]'") from e
+from .base import BasePerplexity, _loads
+from .constants import PPLX_API_ENDPOINT
+from .exceptions import PerplexityAPIError
+from .types import ResponseFormatType
+
+# A streamed answer may take longer than the session's total timeout to generate, so streaming
+# requests are bounded per read instead, like the sync chat_stream.
+_STREAM_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=60, sock_read=60)
+
+
+class AsyncPerplexity(BasePerplexity):
+
+    __slots__ = ("_session",)
+
+    def __init__(self, api_key: str, model: str, system_role: str, config: Optional[Dict[str, Union[float, bool, List, str, int]]] = None, max_history_messages: Optional[int] = 32, history_compactor: Optional[Callable[[List[Dict[str, str]]], List[Dict[str, str]]]] = None):
+        super().__init__(api_key, model, system_role, config, max_history_messages, history_compactor)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def aask(self, message: str, model: str = None, system_role: str = None, append_history: bool = False, response_type: str = "llm_response", **config) -> Union[aiohttp.ClientResponse, str, dict, None]:
+        """
+        Asks the Perplexity AI a question asynchronously.
+
+        This is the coroutine counterpart of Perplexity.ask and accepts the same parameters.
+
+        Parameters:
+            message (str): The message to send to the AI.
+            model (str): Optional model name to use for the request. Defaults to the instance's model.
+            system_role (str): Optional system role to use for the request. Defaults to the instance's system role.
+            append_history (bool): Whether to append the request and response to the chat history. Defaults to False.
+            response_type (str): The type of response to return. Defaults to "llm_response". Valid options are: "raw", "text", "json", and "llm_response".
+            **config: Additional configuration parameters to pass to the Perplexity API, overriding the instance configuration for this request.
+
+        Returns:
+            Union[aiohttp.ClientResponse, str, dict, None]: The response from the Perplexity API, formatted according to the response_type parameter.
+
+        Raises:
+            PerplexityAPIError: If the request fails or the response is invalid.
+        """
+        model = model or self.model
+        system_role = system_role or self.system_role
+        self._validate_required_params(None, model, system_role)
+        config = self._get_validated_config(config)
+
+        response_type = ResponseFormatType.validate_response_type(response_type)
+
+        payload = self._build_ask_payload(message, model, system_role, config)
+
+        formatted_response = await self._post(payload)
+        if append_history and formatted_response["llm_response"]:
+            self._append_exchange(message, formatted_response["llm_response"])
+        return formatted_response[response_type]
+
+    async def achat(self, message: str, response_type: str = "llm_response") -> Union[aiohttp.ClientResponse, str, dict, None]:
+        """
+        Sends a message to the AI asynchronously and appends the response to the chat history.
+
+        Once the history holds more than max_history_messages messages besides the system role,
+        the oldest turns are dropped, or the history is passed to history_compactor if one is set.
+
+        Concurrent calls on the same instance share one chat history, so turns should be awaited in order.
+
+        Parameters:
+            message (str): The message to send to the AI.
+            response_type (str): The type of response to return. Defaults to "llm_response". Valid options are: "raw", "text", "json", and "llm_response".
+
+        Returns:
+            Union[aiohttp.ClientResponse, str, dict, None]: The response from the Perplexity API, formatted according to the response_type parameter.
+
+        Raises:
+            PerplexityAPIError: If the request fails or the response is invalid.
+        """
+        response_type = ResponseFormatType.validate_response_type(response_type)
+
+        self.chat_history.append({
+            "role": "user",
+            "content": message
+        })
+        payload = self._build_payload(self.model)
+        payload["messages"] = self.chat_history
+
+        formatted_response = await self._post(payload)
+        if formatted_response["llm_response"]:
+            self.chat_history.append({
+                "role": "assistant",
+                "content": formatted_response["llm_response"]
+            })
+            self._compact_history()
+        return formatted_response[response_type]
+
+    async def abatch(self, messages: List[str], concurrency: int = 8, response_type: str = "llm_response", **config) -> List[Union[aiohttp.ClientResponse, str, dict, None]]:
+        """
+        Asks the Perplexity AI several independent questions concurrently.
+
+        Each message is sent as a separate aask request over the shared session,
+        with at most `concurrency` requests in flight at once. The chat history is not modified.
+
+        Parameters:
+            messages (List[str]): The messages to send to the AI.
+            concurrency (int): The maximum number of simultaneous requests. Defaults to 8.
+            response_type (str): The type of response to return. Defaults to "llm_response". Valid options are: "raw", "text", "json", and "llm_response".
+            **config: Additional configuration parameters to pass to the Perplexity API, overriding the instance configuration for this request.
+
+        Returns:
+            List[Union[aiohttp.ClientResponse, str, dict, None]]: The responses, in the same order as the messages.
+
+        Raises:
+            PerplexityAPIError: If any of the requests fails or a response is invalid.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        sem = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(self._one(m, sem, response_type, config) for m in messages))
+
+    async def stream_batch(self, prompts: List[str], concurrency: int = 5, **config) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Streams the responses to several independent questions concurrently.
+
+        Each prompt is sent as a separate streaming request, with at most `concurrency` requests
+        in flight at once. Pieces are yielded as soon as they arrive from any request, tagged with
+        the index of their prompt, so pieces of different prompts are interleaved. The chat history is not modified.
+
+        Parameters:
+            prompts (List[str]): The messages to send to the AI.
+            concurrency (int): The maximum number of simultaneous requests. Defaults to 5.
+            **config: Additional configuration parameters to pass to the Perplexity API, overriding the instance configuration for this request.
+
+        Yields:
+            Tuple[int, str]: The index of the prompt and the next piece of its response.
+
+        Raises:
+            PerplexityAPIError: If any of the requests fails or a response is invalid.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        config = self._get_validated_config(config)
+        sem = asyncio.Semaphore(concurrency)
+        queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self._stream_into(queue, idx, prompt, sem, config))
+            for idx, prompt in enumerate(prompts)
+        ]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """
+        Closes the underlying session.
+
+        The session is created lazily on the first request, so this is a no-op if no request was made.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncPerplexity":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        await self.close()
+        return False
+
+    def _init_copy(self, clone: "AsyncPerplexity") -> None:
+        # aiohttp sessions are bound to an event loop, so a copy opens its own on first use.
+        super()._init_copy(clone)
+        clone._session = None
+
+    async def _one(self, message: str, sem: asyncio.Semaphore, response_type: str, config: dict) -> Union[aiohttp.ClientResponse, str, dict, None]:
+        async with sem:
+            return await self.aask(message, response_type=response_type, **config)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # aiohttp sessions must be created inside a running event loop.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    "Authorization": f"Bearer {self.auth_token}",
+                    "Content-Type": "application/json"
+                },
+                timeout=aiohttp.ClientTimeout(total=60),
+                connector=aiohttp.TCPConnector(limit=100, limit_per_host=20)
+            )
+        return self._session
+
+    async def _post(self, payload: dict) -> dict:
+        try:
+            async with self._get_session().post(PPLX_API_ENDPOINT, json=payload) as response:
+                if response.ok:
+                    return await self._format_response(response)
+                await self._raise_response_error(response)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._raise_api_error(e)
+
+    async def _stream(self, payload: dict) -> AsyncIterator[str]:
+        try:
+            async with self._get_session().post(PPLX_API_ENDPOINT, json=payload, timeout=_STREAM_TIMEOUT) as response:
+                if not response.ok:
+                    await self._raise_response_error(response)
+                async for raw in response.content:
+                    raw = raw.strip()
+                    if not raw.startswith(b"data:"):
+                        continue
+                    chunk = raw[5:].strip()
+                    if chunk == b"[DONE]":
+                        break
+                    try:
+                        piece = _loads(chunk)["choices"][0]["delta"].get("content")
+                    except (ValueError, KeyError, IndexError) as e:
+                        raise PerplexityAPIError(f"Invalid stream chunk: {chunk!r}") from e
+                    if piece:
+                        yield piece
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._raise_api_error(e)
+
+    async def _stream_into(self, queue: asyncio.Queue, idx: int, prompt: str, sem: asyncio.Semaphore, config: dict) -> None:
+        try:
+            async with sem:
+                payload = self._build_ask_payload(prompt, self.model, self.system_role, {**config, "stream": True})
+                async for piece in self._stream(payload):
+                    await queue.put((idx, piece))
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
+
+    async def _raise_response_error(self, response: aiohttp.ClientResponse) -> None:
+        try:
+            body = await response.json(content_type=None)
+        except ValueError:
+            body = await response.text()
+        try:
+            response.raise_for_status()
+        except aiohttp.ClientResponseError as e:
+            self._raise_api_error(e, response.status, body)
+
+    async def _format_response(self, response: aiohttp.ClientResponse) -> dict:
+        formatted = {}
+
+        formatted["raw"] = response
+        formatted["text"] = await response.text()
+
+        try:
+            json_data = await response.json(content_type=None)
+            formatted.update({
+                "json": json_data,
+                "llm_response": json_data["choices"][0]["message"]["content"],
+            })
+        except (ValueError, KeyError, TypeError):
+            formatted["json"] = None
+            formatted["llm_response"] = None
+
+        return formatted
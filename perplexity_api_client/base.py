@@ -0,0 +1,319 @@
+"""
+Shared configuration, validation and serialization logic for the Perplexity API clients.
+"""
+
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Union
+from .exceptions import PerplexityAPIError, PerplexityAuthError, PerplexityConfigError
+
+# Payloads are dumped compactly and in insertion order, keeping the static
+# prefix byte-identical across requests.
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    import json
+
+    def _dumps(payload: dict) -> bytes:
+        return json.dumps(payload, separators=(",", ":"), sort_keys=False).encode()
+    _loads = json.loads
+
+_SENTINEL = object()
+
+_ERROR_MAP = {400: PerplexityConfigError, 401: PerplexityAuthError}
+
+
+class BasePerplexity:
+
+    __slots__ = (
+        "auth_token",
+        "model",
+        "system_role",
+        "chat_history",
+        "max_history_messages",
+        "history_compactor",
+        "_static_messages_prefix",
+        "_config",
+        "_effective_config",
+        "_payload_skel",
+    )
+
+    # Read-only so that callers cannot change the defaults shared by every client;
+    # sequence values are tuples for the same reason, since the mapping is only frozen at the top level.
+    default_config: Mapping[str, Union[float, bool, List, str, int]] = MappingProxyType({
+        "max_tokens": None,
+        "temperature": 0.2,
+        "top_p": 0.9,
+        "search_domain_filter": (),
+        "return_images": False,
+        "return_related_questions": False,
+        "search_recency_filter": "month",
+        "top_k": 0,
+        "stream": False,
+        "presence_penalty": 0,
+        "frequency_penalty": 1
+    })
+    _VALID_CONFIG_KEYS = frozenset(default_config)
+    _NONE_DEFAULT_KEYS = frozenset(key for key, value in default_config.items() if value is None)
+    # Sequence options accept lists as well as tuples; they are stored as tuples.
+    _CONFIG_TYPES = {
+        key: (list, tuple) if isinstance(value, tuple) else type(value)
+        for key, value in default_config.items() if value is not None
+    }
+
+    def __init__(self, api_key: str, model: str, system_role: str, config: Optional[Dict[str, Union[float, bool, List, str, int]]] = None, max_history_messages: Optional[int] = 32, history_compactor: Optional[Callable[[List[Dict[str, str]]], List[Dict[str, str]]]] = None):
+        self.auth_token: str = api_key
+        self.model: str = model
+        self.system_role: str = system_role
+        self._validate_required_params()
+        self.chat_history: List[Dict[str, str]] = [
+            {
+                "role": "system",
+                "content": self.system_role,
+            },
+        ]
+        self.max_history_messages: Optional[int] = max_history_messages
+        self.history_compactor: Optional[Callable[[List[Dict[str, str]]], List[Dict[str, str]]]] = history_compactor
+        self._static_messages_prefix = (
+            {
+                "role": "system",
+                "content": self.system_role,
+            },
+        )
+
+        self._config = {}
+        self._effective_config = self._default_effective_config()
+        self._payload_skel = self._build_payload_skel()
+        if config is not None:
+            self._validate_and_set_config(config)
+
+    @property
+    def config(self) -> dict:
+        """
+        Retrieves the current configuration.
+
+        This property combines the default configuration with any custom settings
+        provided by the user, returning a dictionary of configuration values
+        where none of the values are None.
+
+        Returns:
+            Dict[str, Union[float, bool, List, str, int]]: A dictionary of the
+            current configuration settings with non-None values.
+        """
+        return dict(self._effective_config)
+
+    @config.setter
+    def config(self, value) -> None:
+        self.set_config(**value)
+
+    @property
+    def history_len(self) -> int:
+        """
+        Retrieves the number of messages in the chat history, including the system role.
+
+        Returns:
+            int: The length of chat_history.
+        """
+        return len(self.chat_history)
+
+    def set_config(self, **kwargs) -> None:
+        """
+        Sets the configuration parameters.
+
+        This method updates the configuration settings by validating the provided
+        keyword arguments and applying them. Only parameters that differ from the
+        default configuration are updated.
+
+        Parameters:
+            **kwargs: Arbitrary keyword arguments representing configuration settings.
+        """
+        self._validate_and_set_config(kwargs)
+
+    def reset_config(self) -> None:
+        """
+        Resets the configuration to its default values.
+
+        This method does not modify the auth token, model name, or system role.
+        """
+        self._config = {}
+        self._effective_config = self._default_effective_config()
+        self._payload_skel = self._build_payload_skel()
+
+    def __copy__(self) -> "BasePerplexity":
+        """
+        Creates a lightweight copy of the client.
+
+        The copy has the same credentials, model, system role and configuration, a fresh chat history
+        holding only the system role, and reuses the original's HTTP session where possible.
+
+        Returns:
+            BasePerplexity: The new client.
+        """
+        clone = self.__class__.__new__(self.__class__)
+        self._init_copy(clone)
+        return clone
+
+    @classmethod
+    def is_config_valid(cls, config: Dict[str, Union[float, bool, List, str, int]]) -> bool:
+        """
+        Checks if the provided configuration is valid.
+
+        Parameters:
+            config (Dict[str, Union[float, bool, List, str, int]]): The configuration to validate.
+
+        Returns:
+            bool: True if the configuration is valid, False otherwise.
+        """
+        try:
+            cls.validate_config(config)
+            return True
+        except PerplexityConfigError:
+            return False
+
+    @classmethod
+    def validate_config(cls, config: Dict[str, Union[float, bool, List, str, int]]) -> None:
+        """
+        Validates the provided configuration dictionary against the default configuration.
+
+        Parameters:
+            config (Dict[str, Union[float, bool, List, str, int]]): The configuration dictionary to validate.
+
+        Raises:
+            PerplexityConfigError: If a configuration key is invalid or if the type of a configuration value does not match the expected type.
+        """
+        if not isinstance(config, dict):
+            raise TypeError("The configuration must be a dictionary")
+
+        for key, value in config.items():
+            if key not in cls._VALID_CONFIG_KEYS:
+                raise PerplexityConfigError(
+                    f"Invalid configuration key: {key}")
+            if key in cls._CONFIG_TYPES and not isinstance(value, cls._CONFIG_TYPES[key]):
+                raise PerplexityConfigError(
+                    f"Invalid configuration value for key: {key}"
+                )
+
+    def _init_copy(self, clone: "BasePerplexity") -> None:
+        clone.auth_token = self.auth_token
+        clone.model = self.model
+        clone.system_role = self.system_role
+        clone.chat_history = [
+            {
+                "role": "system",
+                "content": self.system_role,
+            },
+        ]
+        clone.max_history_messages = self.max_history_messages
+        clone.history_compactor = self.history_compactor
+        clone._static_messages_prefix = self._static_messages_prefix
+        clone._config = dict(self._config)
+        clone._effective_config = dict(self._effective_config)
+        clone._payload_skel = dict(self._payload_skel)
+
+    def _validate_and_set_config(self, config: Dict[str, Union[float, bool, List, str, int]]) -> None:
+        self.__class__.validate_config(config)
+        changed = False
+        for key, value in config.items():
+            if isinstance(value, list):
+                # Store an immutable copy, so the caller's list and the returned config cannot alias it.
+                value = tuple(value)
+            default = self.default_config.get(key)
+            if value == default:
+                # Setting a key back to its default removes the override.
+                if self._config.pop(key, _SENTINEL) is not _SENTINEL:
+                    if default is None:
+                        self._effective_config.pop(key, None)
+                    else:
+                        self._effective_config[key] = default
+                    changed = True
+                continue
+            if self._config.get(key, _SENTINEL) == value:
+                continue
+            self._config[key] = value
+            self._effective_config[key] = value
+            changed = True
+        if changed:
+            self._payload_skel = self._build_payload_skel()
+
+    def _build_payload_skel(self) -> dict:
+        # Model first and config overrides after it; each request copies this and adds its messages last.
+        return {"model": self.model, **self._config}
+
+    def _default_effective_config(self) -> Dict[str, Union[float, bool, List, str, int]]:
+        config = dict(self.__class__.default_config)
+        for key in self._NONE_DEFAULT_KEYS:
+            del config[key]
+        return config
+
+    def _get_validated_config(self, config: Dict[str, Union[float, bool, List, str, int]]) -> Dict[str, Union[float, bool, List, str, int]]:
+        if not config:
+            return {}
+        self.__class__.validate_config(config)
+        # Lists are compared as tuples, like _validate_and_set_config stores them, so [] matches the () default.
+        return {key: tuple(value) if isinstance(value, list) else value for key, value in config.items()}
+
+    def _build_ask_payload(self, message: str, model: str, system_role: str, config: dict) -> dict:
+        # Static parts first and the user message last, so repeated requests share
+        # the longest possible identical prefix for provider-side prompt caching.
+        payload = self._build_payload(model)
+        for key, value in config.items():
+            if value == self.default_config.get(key):
+                payload.pop(key, None)
+            else:
+                payload[key] = value
+        # Compare with the prefix itself, since system_role may have been reassigned after __init__.
+        if system_role == self._static_messages_prefix[0]["content"]:
+            messages = [*self._static_messages_prefix]
+        else:
+            messages = [{"role": "system", "content": system_role}]
+        messages.append({"role": "user", "content": message})
+        payload["messages"] = messages
+        return payload
+
+    def _build_payload(self, model: str) -> dict:
+        payload = self._payload_skel.copy()
+        payload["model"] = model
+        return payload
+
+    def _append_exchange(self, message: str, response: str) -> None:
+        self.chat_history.append({
+            "role": "user",
+            "content": message
+        })
+        self.chat_history.append({
+            "role": "assistant",
+            "content": response
+        })
+        self._compact_history()
+
+    def _compact_history(self) -> None:
+        # Keep the system role plus at most max_history_messages of the most recent turns,
+        # so the payload re-sent on every chat() call stays bounded.
+        if self.max_history_messages is None or len(self.chat_history) <= self.max_history_messages + 1:
+            return
+        if self.history_compactor is not None:
+            self.chat_history = self.history_compactor(self.chat_history)
+            return
+        # Trim in place rather than rebuilding the list; a deque(maxlen=...) would evict the system role.
+        cut = len(self.chat_history) - self.max_history_messages
+        while cut < len(self.chat_history) and self.chat_history[cut]["role"] != "user":
+            cut += 1
+        del self.chat_history[1:cut]
+
+    def _raise_api_error(self, e: Exception, status_code: int = None, body: Union[dict, str, None] = None) -> None:
+        error_msg = f"Request failed: {str(e)}"
+        if status_code is not None:
+            error_msg += f"\nStatus code: {status_code}\nResponse: {body}"
+        raise _ERROR_MAP.get(status_code, PerplexityAPIError)(error_msg, status_code) from e
+
+    def _validate_required_params(self, api_key: str = None, model: str = None, system_role: str = None) -> None:
+        api_key = api_key or self.auth_token
+        model = model or self.model
+        system_role = system_role or self.system_role
+        if not api_key:
+            raise PerplexityAuthError("API key is required")
+        if not model:
+            raise PerplexityConfigError("Model name is required")
+        if not system_role:
+            raise PerplexityConfigError("System role is required")
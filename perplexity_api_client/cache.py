@@ -0,0 +1,128 @@
+"""
+An in-process response cache for deterministic Perplexity API calls.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, MutableMapping, Optional
+
+
+def cache_key(model: str, messages: List[Dict[str, str]], temperature: float, config: Optional[dict] = None) -> Optional[str]:
+    """
+    Builds a cache key for a chat completion request.
+
+    Only deterministic requests are cacheable, so no key is returned when the temperature is above zero.
+
+    Parameters:
+        model (str): The model name of the request.
+        messages (List[Dict[str, str]]): The messages sent to the API.
+        temperature (float): The sampling temperature of the request.
+        config (dict): Any other request parameters that affect the completion.
+
+    Returns:
+        Optional[str]: The sha256 hex digest of the canonical request, or None if the request is not cacheable.
+    """
+    if temperature > 0:
+        return None
+    canonical = json.dumps({
+        "model": model,
+        "messages": messages,
+        "temperature": float(temperature),
+        "tools": None,
+        "config": config or {},
+    }, sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class LLMCache:
+    """A thread-safe least-recently-used cache with an optional time-to-live for API responses"""
+
+    def __init__(self, maxsize: int = 128, ttl_seconds: Optional[float] = None, backend: Optional[MutableMapping] = None, lock: Optional[threading.Lock] = None) -> None:
+        """
+        Parameters:
+            maxsize (int): The maximum number of stored entries. Defaults to 128.
+            ttl_seconds (Optional[float]): How long an entry stays valid. Defaults to None, meaning forever.
+            backend (Optional[MutableMapping]): The mapping that stores the entries. It must keep insertion order.
+                Defaults to a new in-memory OrderedDict.
+            lock (Optional[threading.Lock]): The lock guarding the backend. Caches that share a backend must
+                also share its lock, and should use the same maxsize and ttl_seconds. Hits and misses are
+                still counted per cache. Defaults to a new lock.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: MutableMapping = backend if backend is not None else OrderedDict()
+        self._lock = lock if lock is not None else threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Retrieves the cache counters.
+
+        Returns:
+            Dict[str, int]: The number of hits, misses and currently stored entries.
+        """
+        return {"hits": self._hits, "misses": self._misses, "size": len(self._entries)}
+
+    def get(self, key: Optional[str]) -> Any:
+        """
+        Looks up a cached value and marks it as recently used.
+
+        Parameters:
+            key (Optional[str]): The cache key. A None key is always a miss.
+
+        Returns:
+            Any: The cached value, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl_seconds is None or time.monotonic() - stored_at < self.ttl_seconds:
+                    self._touch(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def set(self, key: Optional[str], value: Any) -> None:
+        """
+        Stores a value, evicting the least recently used entry when the cache is full.
+
+        Parameters:
+            key (Optional[str]): The cache key. Values with a None key are not stored.
+            value (Any): The value to store.
+        """
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._touch(key)
+            while len(self._entries) > self.maxsize:
+                del self._entries[next(iter(self._entries))]
+
+    def clear(self) -> None:
+        """
+        Removes all entries and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def _touch(self, key: str) -> None:
+        # Move the key to the most recently used end of the backend.
+        if isinstance(self._entries, OrderedDict):
+            self._entries.move_to_end(key)
+        else:
+            self._entries[key] = self._entries.pop(key)
@@ -1 +1,2 @@
-PPLX_API_ENDPOINT = "https://api.perplexity.ai/chat/completions"
+PPLX_API_BASE = "https://api.perplexity.ai/"
+PPLX_API_ENDPOINT = PPLX_API_BASE + "chat/completions"
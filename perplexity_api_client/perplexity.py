@@ -2,90 +2,47 @@
 A Perplexity API client wrapper module for Python.
 """
 
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Union
 import requests
-from .exceptions import PerplexityAPIError, PerplexityAuthError, PerplexityConfigError
-from .constants import PPLX_API_ENDPOINT
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .base import BasePerplexity, _dumps, _loads
+from .cache import LLMCache, cache_key
+from .constants import PPLX_API_BASE, PPLX_API_ENDPOINT
+from .exceptions import PerplexityAPIError
 from .types import ResponseFormatType
 
+class Perplexity(BasePerplexity):
 
-class Perplexity:
-
-    default_config: Dict[str, Union[float, bool, List, str, int]] = {
-        "max_tokens": None,
-        "temperature": 0.2,
-        "top_p": 0.9,
-        "search_domain_filter": [],
-        "return_images": False,
-        "return_related_questions": False,
-        "search_recency_filter": "month",
-        "top_k": 0,
-        "stream": False,
-        "presence_penalty": 0,
-        "frequency_penalty": 1
-    }
-
-    def __init__(self, api_key: str, model: str, system_role: str, config: Optional[Dict[str, Union[float, bool, List, str, int]]] = None):
-        self.auth_token: str = api_key
-        self.model: str = model
-        self.system_role: str = system_role
-        self._validate_required_params()
-        self.chat_history: List[Dict[str, str]] = [
-            {
-                "role": "system",
-                "content": self.system_role,
-            },
-        ]
-
-        self.__config = {}
-        if config is not None:
-            self._validate_and_set_config(config)
+    # "__session" is name-mangled to _Perplexity__session like the attribute itself.
+    __slots__ = ("cache", "__session", "_owns_session")
+
+    def __init__(self, api_key: str, model: str, system_role: str, config: Optional[Dict[str, Union[float, bool, List, str, int]]] = None, cache: Optional[LLMCache] = None, max_history_messages: Optional[int] = 32, history_compactor: Optional[Callable[[List[Dict[str, str]]], List[Dict[str, str]]]] = None):
+        super().__init__(api_key, model, system_role, config, max_history_messages, history_compactor)
+        self.cache: Optional[LLMCache] = cache
         self.__session = requests.Session()
+        self._owns_session: bool = True
         self.__session.headers.update({
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         })
-
-    @property
-    def config(self) -> dict:
-        """
-        Retrieves the current configuration.
-
-        This property combines the default configuration with any custom settings
-        provided by the user, returning a dictionary of configuration values
-        where none of the values are None.
-
-        Returns:
-            Dict[str, Union[float, bool, List, str, int]]: A dictionary of the
-            current configuration settings with non-None values.
-        """
-        config = {**self.__class__.default_config, **self.__config}
-        return {key: value for key, value in config.items() if value is not None}
-
-    @config.setter
-    def config(self, value) -> None:
-        self.set_config(**value)
-
-    def set_config(self, **kwargs) -> None:
-        """
-        Sets the configuration parameters.
-
-        This method updates the configuration settings by validating the provided
-        keyword arguments and applying them. Only parameters that differ from the
-        default configuration are updated.
-
-        Parameters:
-            **kwargs: Arbitrary keyword arguments representing configuration settings.
-        """
-        self._validate_and_set_config(kwargs)
-
-    def reset_config(self) -> None:
-        """
-        Resets the configuration to its default values.
-
-        This method does not modify the auth token, model name, or system role.
-        """
-        self.__config = {}
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=32,
+            pool_block=False,
+            # read=0: a POST whose response timed out may already be a billed completion,
+            # so only connection errors and the status codes below are retried.
+            max_retries=Retry(
+                total=3,
+                read=0,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["POST"],
+                raise_on_status=False
+            )
+        )
+        self.__session.mount("https://", adapter)
 
     def ask(self, message: str, model: str = None, system_role: str = None, append_history: bool = False, response_type: str = "llm_response", **config) -> Union[requests.Response, str, dict, None]:
         """
@@ -101,7 +58,7 @@ class Perplexity:
             system_role (str): Optional system role to use for the request. Defaults to the instance's system role.
             append_history (bool): Whether to append the request and response to the chat history. Defaults to False.
             response_type (str): The type of response to return. Defaults to "llm_response". Valid options are: "raw", "text", "json", and "llm_response".
-            **config: Additional configuration parameters to pass to the Perplexity API.
+            **config: Additional configuration parameters to pass to the Perplexity API, overriding the instance configuration for this request.
 
         Returns:
             Union[requests.Response, str, dict, None]: The response from the Perplexity API, formatted according to the response_type parameter.
@@ -115,49 +72,53 @@ class Perplexity:
         append_history = append_history or False
         config = self._get_validated_config(config)
 
-        ResponseFormatType.validate_response_type(response_type)
-
-        payload = {
-            "model": model,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": system_role
-                },
-                {
-                    "role": "user",
-                    "content": message
-                }
-            ],
-            **config
-        }
+        response_type = ResponseFormatType.validate_response_type(response_type)
 
-        try:
-            response = self.__session.request(
-                "POST", PPLX_API_ENDPOINT, json=payload, timeout=60)
+        payload = self._build_ask_payload(message, model, system_role, config)
 
-            if response.ok:
-                formatted_response = self._format_response(
-                    response)
-                if append_history and formatted_response["llm_response"]:
-                    self.chat_history.append({
-                        "role": "user",
-                        "content": message
-                    })
-                    self.chat_history.append({
-                        "role": "assistant",
-                        "content": formatted_response["llm_response"]
-                    })
-
-                return formatted_response[response_type]
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            self._raise_error_message(e)
+        formatted_response = self._send(payload, response_type, append_history)
+        if append_history and formatted_response["llm_response"]:
+            self._append_exchange(message, formatted_response["llm_response"])
+        return formatted_response[response_type]
+
+    def ask_batch(self, prompts: List[str], concurrency: int = 8, response_type: str = "llm_response", **config) -> List[Union[requests.Response, str, dict, None]]:
+        """
+        Asks the Perplexity AI several independent questions concurrently.
+
+        The Perplexity API answers one prompt per request, so each prompt is sent as a separate
+        ask request from a thread pool, sharing the session's keep-alive connection pool.
+        At most `concurrency` requests are in flight at once. The chat history is not modified.
+
+        Parameters:
+            prompts (List[str]): The messages to send to the AI.
+            concurrency (int): The maximum number of simultaneous requests. Defaults to 8.
+            response_type (str): The type of response to return. Defaults to "llm_response". Valid options are: "raw", "text", "json", and "llm_response".
+            **config: Additional configuration parameters to pass to the Perplexity API, overriding the instance configuration for this request.
+
+        Returns:
+            List[Union[requests.Response, str, dict, None]]: The responses, in the same order as the prompts.
+
+        Raises:
+            PerplexityAPIError: If any of the requests fails or a response is invalid.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        response_type = ResponseFormatType.validate_response_type(response_type)
+        config = self._get_validated_config(config)
+        with ThreadPoolExecutor(max_workers=min(concurrency, len(prompts) or 1)) as executor:
+            futures = [
+                executor.submit(self.ask, prompt, response_type=response_type, **config)
+                for prompt in prompts
+            ]
+            return [future.result() for future in futures]
 
     def chat(self, message: str, response_type: str = "llm_response") -> Union[requests.Response, str, dict, None]:
         """
         Sends a message to the AI and appends the response to the chat history.
 
+        Once the history holds more than max_history_messages messages besides the system role,
+        the oldest turns are dropped, or the history is passed to history_compactor if one is set.
+
         Parameters:
             message (str): The message to send to the AI.
             response_type (str): The type of response to return. Defaults to "llm_response". Valid options are: "raw", "text", "json", and "llm_response".
@@ -168,139 +129,206 @@ class Perplexity:
         Raises:
             PerplexityAPIError: If the request fails or the response is invalid.
         """
-        ResponseFormatType.validate_response_type(response_type)
-        self._validate_required_params()
+        response_type = ResponseFormatType.validate_response_type(response_type)
 
         self.chat_history.append({
             "role": "user",
             "content": message
         })
-        payload = {
-            "model": self.model,
-            "messages": self.chat_history,
-            **self.__config
-        }
+        payload = self._build_payload(self.model)
+        payload["messages"] = self.chat_history
+
+        formatted_response = self._send(payload, response_type)
+        if formatted_response["llm_response"]:
+            self.chat_history.append({
+                "role": "assistant",
+                "content": formatted_response["llm_response"]
+            })
+            self._compact_history()
+        return formatted_response[response_type]
 
-        try:
-            response = self.__session.request(
-                "POST", PPLX_API_ENDPOINT, json=payload, timeout=60)
+    def chat_stream(self, message: str) -> Iterator[str]:
+        """
+        Sends a message to the AI and streams the response as it is generated.
 
-            if response.ok:
-                formatted_response = self._format_response(
-                    response)
-                if formatted_response["llm_response"]:
-                    self.chat_history.append({
-                        "role": "assistant",
-                        "content": formatted_response["llm_response"]
-                    })
-                return formatted_response[response_type]
-            response.raise_for_status()
+        The request is made with stream=True and the server-sent events are parsed incrementally,
+        so the first tokens are available before the completion has finished. Once the stream ends,
+        the full response is appended to the chat history just like chat().
+
+        Parameters:
+            message (str): The message to send to the AI.
+
+        Yields:
+            str: The pieces of the response content, in order.
+
+        Raises:
+            PerplexityAPIError: If the request fails or the response is invalid.
+        """
+        self.chat_history.append({
+            "role": "user",
+            "content": message
+        })
+        payload = self._build_payload(self.model)
+        payload["stream"] = True
+        payload["messages"] = self.chat_history
+
+        buffer = []
+        try:
+            with self.__session.post(PPLX_API_ENDPOINT, data=_dumps(payload), stream=True, timeout=60) as response:
+                if not response.ok:
+                    # Raise while the response is still open, so the error body can be read.
+                    try:
+                        response.raise_for_status()
+                    except requests.exceptions.HTTPError as e:
+                        self._raise_error_message(e)
+                for raw in response.iter_lines():
+                    if not raw or not raw.startswith(b"data:"):
+                        continue
+                    chunk = raw[5:].strip()
+                    if chunk == b"[DONE]":
+                        break
+                    try:
+                        piece = _loads(chunk)["choices"][0]["delta"].get("content")
+                    except (ValueError, KeyError, IndexError) as e:
+                        raise PerplexityAPIError(f"Invalid stream chunk: {chunk!r}") from e
+                    if piece:
+                        buffer.append(piece)
+                        yield piece
         except requests.exceptions.RequestException as e:
             self._raise_error_message(e)
 
-    def close(self) -> None:
-        """
-        Closes the underlying session.
+        if buffer:
+            self.chat_history.append({
+                "role": "assistant",
+                "content": "".join(buffer)
+            })
+            self._compact_history()
 
-        This method closes the underlying session which was created when the class was instantiated.
-        It is recommended to call this method when you are finished using the class to free up resources.
+    def warm_up(self, timeout: float = 5) -> bool:
         """
-        self.__session.close()
+        Opens a connection to the Perplexity API ahead of the first request.
 
-    @classmethod
-    def is_config_valid(cls, config: Dict[str, Union[float, bool, List, str, int]]) -> bool:
-        """
-        Checks if the provided configuration is valid.
+        A HEAD request to the API host resolves DNS and performs the TCP and TLS handshakes,
+        leaving a keep-alive connection in the session's pool for the next ask or chat call.
+        Network errors are ignored, since a failed warm-up only means the first request pays the handshake itself.
 
         Parameters:
-            config (Dict[str, Union[float, bool, List, str, int]]): The configuration to validate.
+            timeout (float): The timeout of the HEAD request in seconds. Defaults to 5.
 
         Returns:
-            bool: True if the configuration is valid, False otherwise.
+            bool: True if the API host answered, False otherwise.
         """
+        session = self.__session
+        # The mounted adapter retries connection errors with backoff, so send through one without
+        # retries that shares its pools; an unreachable host then costs a single attempt of `timeout`.
+        mounted = session.get_adapter(PPLX_API_BASE)
+        adapter = HTTPAdapter(max_retries=0)
+        adapter.poolmanager = mounted.poolmanager
+        adapter.proxy_manager = mounted.proxy_manager
+        request = session.prepare_request(requests.Request("HEAD", PPLX_API_BASE))
+        settings = session.merge_environment_settings(request.url, {}, None, None, None)
         try:
-            cls.validate_config(config)
-            return True
-        except PerplexityConfigError:
+            # Reading the empty body releases the connection back to the shared pool.
+            adapter.send(request, timeout=timeout, **settings).content
+        except requests.exceptions.RequestException:
             return False
+        return True
 
-    @classmethod
-    def validate_config(cls, config: Dict[str, Union[float, bool, List, str, int]]) -> None:
+    def close(self) -> None:
         """
-        Validates the provided configuration dictionary against the default configuration.
-
-        Parameters:
-            config (Dict[str, Union[float, bool, List, str, int]]): The configuration dictionary to validate.
+        Closes the underlying session.
 
-        Raises:
-            PerplexityConfigError: If a configuration key is invalid or if the type of a configuration value does not match the expected type.
+        This method closes the underlying session which was created when the class was instantiated,
+        which also closes the pooled connections of its mounted HTTPAdapter.
+        It is recommended to call this method when you are finished using the class to free up resources.
+        Copies made with copy.copy share the original's session, so closing a copy does nothing.
         """
-        if not isinstance(config, dict):
-            raise TypeError("The configuration must be a dictionary")
-
-        for key, value in config.items():
-            if key not in cls.default_config:
-                raise PerplexityConfigError(
-                    f"Invalid configuration key: {key}")
-            if cls.default_config[key] is not None and not isinstance(value, type(cls.default_config[key])):
-                raise PerplexityConfigError(
-                    f"Invalid configuration value for key: {key}"
-                )
-
-    def _validate_and_set_config(self, config: Dict[str, Union[float, bool, List, str, int]]) -> None:
-        self.__class__.validate_config(config)
-        for key, value in config.items():
-            if value != self.default_config.get(key):
-                self.__config[key] = value
-
-    def _get_validated_config(self, config: Dict[str, Union[float, bool, List, str, int]]) -> Dict[str, Union[float, bool, List, str, int]]:
-        self.__class__.validate_config(config)
-        return {key: value for key, value in config.items() if value != self.default_config.get(key)}
+        if self._owns_session:
+            self.__session.close()
 
-    def _raise_error_message(self, e) -> None:
-        error_msg = f"Request failed: {str(e)}"
-        if hasattr(e, 'response') and e.response is not None:
-            status_code = e.response.status_code
-            error_msg += f"\nStatus code: {e.response.status_code}"
-            try:
-                error_msg += f"\nResponse: {e.response.json()}"
-            except ValueError:
-                error_msg += f"\nResponse: {e.response.text}"
+    def __enter__(self) -> "Perplexity":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
 
-            if status_code == 400:
-                raise PerplexityConfigError(error_msg, status_code)
+    def __del__(self) -> None:
+        # Safety net for clients that are never closed; __init__ may have failed before the session existed.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _init_copy(self, clone: "Perplexity") -> None:
+        super()._init_copy(clone)
+        clone.cache = self.cache
+        clone.__session = self.__session
+        clone._owns_session = False
+
+    def _send(self, payload: dict, response_type: str = "llm_response", with_llm_response: bool = True) -> dict:
+        key = self._cache_key(payload)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._format_response(cached, response_type, with_llm_response)
+
+        # Auth and content type live on the session, so no per-request headers are passed.
+        try:
+            response = self.__session.post(
+                PPLX_API_ENDPOINT, data=_dumps(payload), timeout=60)
+
+            if response.ok:
+                formatted = self._format_response(response, response_type, with_llm_response or key is not None)
+                # Only cache replies that parsed, so a malformed 200 is not served again from the cache.
+                if key is not None and formatted["llm_response"] is not None:
+                    self.cache.set(key, response)
+                return formatted
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            self._raise_error_message(e)
 
-            if status_code == 401:
-                raise PerplexityAuthError(error_msg, status_code)
+    def _cache_key(self, payload: dict) -> Optional[str]:
+        if self.cache is None:
+            return None
+        temperature = payload.get("temperature", self.default_config["temperature"])
+        config = {key: value for key, value in payload.items() if key not in ("model", "messages", "temperature")}
+        return cache_key(payload["model"], payload["messages"], temperature, config)
 
-        raise PerplexityAPIError(error_msg, getattr(
-            e.response, 'status_code', None)) from e
+    def _raise_error_message(self, e) -> None:
+        response = getattr(e, 'response', None)
+        status_code = getattr(response, 'status_code', None)
+        body = None
+        if response is not None:
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+        self._raise_api_error(e, status_code, body)
 
-    def _format_response(self, response: requests.Response) -> dict:
+    def _format_response(self, response: requests.Response, response_type: str = "llm_response", with_llm_response: bool = True) -> dict:
+        # Only decode what the caller asked for; the body is parsed for "json" and
+        # "llm_response", or when the reply has to be appended to the chat history.
         formatted = {}
 
-        formatted["raw"] = response
-        formatted["text"] = response.text
+        if response_type == "raw":
+            formatted["raw"] = response
+        elif response_type == "text":
+            formatted["text"] = response.text
 
-        try:
-            json_data = response.json()
-            formatted.update({
-                "json": json_data,
-                "llm_response": json_data["choices"][0]["message"]["content"],
-            })
-        except (ValueError, KeyError):
-            formatted["json"] = None
-            formatted["llm_response"] = None
+        if with_llm_response or response_type in ("json", "llm_response"):
+            try:
+                json_data = _loads(response.content)
+            except ValueError:
+                json_data = None
+            formatted["json"] = json_data
+            formatted["llm_response"] = self._extract_llm_response(json_data)
 
         return formatted
 
-    def _validate_required_params(self, api_key: str = None, model: str = None, system_role: str = None) -> None:
-        api_key = api_key or self.auth_token
-        model = model or self.model
-        system_role = system_role or self.system_role
-        if not api_key:
-            raise PerplexityAuthError("API key is required")
-        if not model:
-            raise PerplexityConfigError("Model name is required")
-        if not system_role:
-            raise PerplexityConfigError("System role is required")
+    @staticmethod
+    def _extract_llm_response(json_data: Optional[dict]) -> Optional[str]:
+        try:
+            return json_data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            return None
@@ -9,27 +9,33 @@ class ResponseFormatType(Enum):
     LLM_RESPONSE = "llm_response"
 
     @classmethod
-    def validate_response_type(cls, response_type: Union[str, "ResponseFormatType"]) -> None:
+    def validate_response_type(cls, response_type: Union[str, "ResponseFormatType"]) -> str:
         """
         Validates a response_type against the enum values.
 
         Parameters:
             response_type: the value to validate. Must be a str or ResponseType enum value.
 
+        Returns:
+            str: the validated response type as its string value.
+
         Raises:
             TypeError: if the argument is not a str or ResponseType enum value.
             ValueError: if the argument is not a valid enum value.
 
         """
-        if not isinstance(response_type, (str, cls)):
+        value = response_type.value if isinstance(response_type, cls) else response_type
+        if not isinstance(value, str):
             raise TypeError(
                 f"Invalid argument type: {type(response_type)}. "
                 f"Expected str or {cls.__name__}"
             )
-        try:
-            cls(response_type)
-        except ValueError as exc:
+        if value not in _VALID_RESPONSE_TYPES:
             raise ValueError(
                 f"Invalid response_type: {response_type}. "
                 f"Valid options are: {[t.value for t in cls]}"
-            ) from exc
+            )
+        return value
+
+
+_VALID_RESPONSE_TYPES = frozenset(t.value for t in ResponseFormatType)
@@ -0,0 +1,21 @@
+import os
+from pathlib import Path
+
+ENV_FILE = Path(__file__).resolve().parent.parent / '.env'
+
+
+def load_env(path: Path = ENV_FILE) -> None:
+    """
+    讀取專案根目錄的 .env，只補上尚未設定的環境變數
+
+    已設定 PPLX_API_KEY（例如 CI 由 secrets 注入）時直接略過，不讀取檔案。
+    只支援簡單的 KEY=VALUE 格式，忽略空行與 # 註解。
+    """
+    if os.getenv('PPLX_API_KEY') or not path.is_file():
+        return
+    for line in path.read_text(encoding='utf-8').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line:
+            continue
+        key, value = line.removeprefix('export ').split('=', 1)
+        os.environ.setdefault(key.strip(), value.strip().strip('\'"'))
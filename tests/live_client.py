@@ -0,0 +1,35 @@
+import atexit
+import os
+from typing import Optional
+from perplexity_api_client import Perplexity, LLMCache
+
+TEST_MODEL = 'llama-3.1-sonar-small-128k-online'
+TEST_ROLE = 'You are a helpful assistant.'
+
+_client: Optional[Perplexity] = None
+
+
+def shared_client() -> Optional[Perplexity]:
+    """
+    回傳整個測試行程共用的實際 API 客戶端，未設定 API 金鑰時回傳 None
+
+    客戶端只在第一次呼叫時建立並預先建立連線，之後所有實際 API 測試模組共用同一個連線池與快取，
+    在行程結束時才關閉。需要修改設定的測試請以 copy.copy 取得複本。
+    """
+    global _client
+    if _client is None:
+        api_key = os.getenv('PPLX_API_KEY')
+        if not api_key:
+            return None
+        # temperature 為 0 時相同的請求由快取回應，不再呼叫 API
+        _client = Perplexity(
+            api_key=api_key,
+            model=TEST_MODEL,
+            system_role=TEST_ROLE,
+            config={"temperature": 0.0},
+            cache=LLMCache()
+        )
+        # 先建立 DNS/TLS 連線，讓第一個請求不必負擔握手時間
+        _client.warm_up()
+        atexit.register(_client.close)
+    return _client
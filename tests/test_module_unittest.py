@@ -1,13 +1,19 @@
+import copy
+import io
+import json
 import os
+import subprocess
+import sys
 import unittest
-from unittest.mock import patch, MagicMock
-from dotenv import load_dotenv
+from unittest.mock import patch, MagicMock, PropertyMock
 import requests
+import urllib3
 from perplexity_api_client import Perplexity
 from perplexity_api_client.types import ResponseFormatType
 from perplexity_api_client.exceptions import PerplexityAuthError, PerplexityConfigError, PerplexityAPIError
+from tests.env_utils import load_env
 
-load_dotenv()
+load_env()
 
 
 class TestPerplexity(unittest.TestCase):
@@ -19,21 +25,24 @@ class TestPerplexity(unittest.TestCase):
         os.environ.setdefault('PERPLEXITY_API_KEY', 'test-api-key')
         os.environ.setdefault('PERPLEXITY_MODEL', 'test-model')
         os.environ.setdefault('PERPLEXITY_SYSTEM_ROLE', 'test-role')
+        cls.api_key = os.getenv('PERPLEXITY_API_KEY')
+        cls.model = os.getenv('PERPLEXITY_MODEL')
+        cls.system_role = os.getenv('PERPLEXITY_SYSTEM_ROLE')
+        # 建立一次原型，各測試複製使用並共用同一個連線
+        cls._prototype = Perplexity(
+            api_key=cls.api_key,
+            model=cls.model,
+            system_role=cls.system_role
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        """在所有測試結束後關閉共用的連線"""
+        cls._prototype.close()
 
     def setUp(self):
         """設置測試環境"""
-        self.api_key = os.getenv('PERPLEXITY_API_KEY')
-        self.model = os.getenv('PERPLEXITY_MODEL')
-        self.system_role = os.getenv('PERPLEXITY_SYSTEM_ROLE')
-        self.client = Perplexity(
-            api_key=self.api_key,
-            model=self.model,
-            system_role=self.system_role
-        )
-
-    def tearDown(self):
-        """清理測試環境"""
-        self.client.close()
+        self.client = copy.copy(self._prototype)
 
     def test_initialization(self):
         """測試初始化"""
@@ -41,6 +50,103 @@ class TestPerplexity(unittest.TestCase):
         self.assertEqual(self.client.model, self.model)
         self.assertEqual(self.client.system_role, self.system_role)
         self.assertEqual(len(self.client.chat_history), 1)  # 應該只有 system role
+        self.assertEqual(self.client.history_len, 1)
+
+    def test_copy(self):
+        """測試複製的客戶端共用連線但有獨立的聊天紀錄與設定"""
+        self.client.set_config(temperature=0.5)
+        self.client.chat_history.append({"role": "user", "content": "test"})
+        clone = copy.copy(self.client)
+        self.assertIs(clone._Perplexity__session, self.client._Perplexity__session)
+        self.assertEqual(clone.history_len, 1)
+        self.assertEqual(clone.config["temperature"], 0.5)
+        clone.set_config(temperature=0.8)
+        self.assertEqual(self.client.config["temperature"], 0.5)
+
+        with patch('requests.Session.close') as mock_close:
+            clone.close()
+            mock_close.assert_not_called()
+
+    def test_import_does_not_load_aiohttp(self):
+        """測試只使用同步客戶端時不會載入 aiohttp"""
+        code = ("import sys, perplexity_api_client; "
+                "assert 'aiohttp' not in sys.modules; "
+                "perplexity_api_client.AsyncPerplexity; "
+                "assert 'aiohttp' in sys.modules")
+        subprocess.run([sys.executable, "-c", code], check=True,
+                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    def test_slots(self):
+        """測試客戶端使用 __slots__ 而沒有實例字典"""
+        self.assertFalse(hasattr(self.client, "__dict__"))
+        with self.assertRaises(AttributeError):
+            self.client.unknown_attribute = "value"
+
+    def test_session_adapter(self):
+        """測試連線池與重試設定"""
+        session = self.client._Perplexity__session
+        adapter = session.get_adapter("https://api.perplexity.ai")
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertEqual(adapter.max_retries.total, 3)
+        self.assertEqual(adapter.max_retries.read, 0)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+
+    @patch('urllib3.connectionpool.HTTPConnectionPool._make_request')
+    def test_read_timeout_is_not_retried(self, mock_make_request):
+        """測試讀取逾時的 POST 不會重送，以免重複計費"""
+        mock_make_request.side_effect = urllib3.exceptions.ReadTimeoutError(
+            None, "https://api.perplexity.ai/chat/completions", "Read timed out.")
+        with self.assertRaises(PerplexityAPIError):
+            self.client.ask("test")
+        self.assertEqual(mock_make_request.call_count, 1)
+
+    def test_requests_reuse_session_adapter(self):
+        """測試每次請求都經由同一個 session 的連線池，而不是各自建立連線"""
+        def send(adapter, prepared, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b'{"choices":[{"message":{"content":"test response"}}]}'
+            response.request = prepared
+            return response
+
+        with patch('requests.adapters.HTTPAdapter.send', autospec=True, side_effect=send) as mock_send, \
+                patch('requests.post') as mock_post:
+            self.client.ask("test")
+            self.client.chat("test")
+        mock_post.assert_not_called()
+        adapter = self.client._Perplexity__session.get_adapter("https://api.perplexity.ai")
+        self.assertEqual([call.args[0] for call in mock_send.call_args_list], [adapter, adapter])
+
+    @patch('requests.adapters.HTTPAdapter.send', autospec=True)
+    def test_warm_up(self, mock_send):
+        """測試預先建立連線時共用連線池，且忽略網路錯誤"""
+        self.assertTrue(self.client.warm_up())
+        adapter, prepared = mock_send.call_args.args
+        self.assertEqual(prepared.method, "HEAD")
+        self.assertEqual(prepared.url, "https://api.perplexity.ai/")
+        self.assertEqual(mock_send.call_args.kwargs["timeout"], 5)
+        mounted = self.client._Perplexity__session.get_adapter("https://api.perplexity.ai")
+        self.assertIs(adapter.poolmanager, mounted.poolmanager)
+        self.assertEqual(adapter.max_retries.total, 0)
+
+        mock_send.side_effect = requests.exceptions.ConnectionError()
+        self.assertFalse(self.client.warm_up())
+
+    @patch('urllib3.util.connection.create_connection')
+    def test_warm_up_does_not_retry(self, mock_connect):
+        """測試無法連線時預先建立連線只嘗試一次"""
+        mock_connect.side_effect = OSError("unreachable")
+        self.assertFalse(self.client.warm_up(timeout=1))
+        self.assertEqual(mock_connect.call_count, 1)
+
+    @patch('requests.Session.close')
+    def test_context_manager(self, mock_close):
+        """測試以 with 陳述式使用客戶端時會關閉連線"""
+        with Perplexity(api_key=self.api_key, model=self.model,
+                        system_role=self.system_role) as client:
+            self.assertIsInstance(client, Perplexity)
+            mock_close.assert_not_called()
+        mock_close.assert_called()
 
     def test_invalid_initialization(self):
         """測試無效的初始化參數"""
@@ -70,6 +176,83 @@ class TestPerplexity(unittest.TestCase):
         self.client.reset_config()
         self.assertEqual(self.client.config["temperature"], 0.2)  # 預設值
 
+    @patch('requests.Session.request')
+    def test_config_set_back_to_default(self, mock_request):
+        """測試將設定改回預設值時會移除覆寫"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test chat response"}}]}'
+        mock_request.return_value = mock_response
+
+        self.client.set_config(temperature=0.5, max_tokens=100)
+        self.client.set_config(temperature=0.2, max_tokens=None)
+        self.assertEqual(self.client.config["temperature"], 0.2)
+        self.assertNotIn("max_tokens", self.client.config)
+
+        self.client.chat("test message")
+        payload = json.loads(mock_request.call_args.kwargs["data"])
+        self.assertNotIn("temperature", payload)
+        self.assertNotIn("max_tokens", payload)
+
+    def test_default_config_is_read_only(self):
+        """測試預設設定無法被修改"""
+        with self.assertRaises(TypeError):
+            Perplexity.default_config["temperature"] = 0.5
+        with self.assertRaises(AttributeError):
+            Perplexity.default_config.pop("max_tokens")
+        self.assertEqual(Perplexity.default_config["temperature"], 0.2)
+
+    def test_default_config_values_are_not_shared(self):
+        """測試修改取得的設定值不會影響預設設定與其他客戶端"""
+        with self.assertRaises(AttributeError):
+            self.client.config["search_domain_filter"].append("example.com")
+        self.assertEqual(Perplexity.default_config["search_domain_filter"], ())
+
+        domains = ["example.com"]
+        self.client.set_config(search_domain_filter=domains)
+        domains.append("other.com")
+        self.assertEqual(self.client.config["search_domain_filter"], ("example.com",))
+        self.assertEqual(copy.copy(self._prototype).config["search_domain_filter"], ())
+
+        self.client.set_config(search_domain_filter=[])
+        self.assertEqual(self.client.config, copy.copy(self._prototype).config)
+
+    def test_config_is_copy(self):
+        """測試取得的設定為副本"""
+        config = self.client.config
+        config["temperature"] = 0.9
+        self.assertEqual(self.client.config["temperature"], 0.2)
+        self.assertNotIn("max_tokens", self.client.config)
+
+    @patch('requests.Session.request')
+    def test_ask_default_list_config_is_not_sent(self, mock_request):
+        """測試單次請求傳入與預設相同的空清單時不會送出該設定"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test response"}}]}'
+        mock_request.return_value = mock_response
+
+        self.client.ask("test", search_domain_filter=[])
+        payload = json.loads(mock_request.call_args.kwargs["data"])
+        self.assertNotIn("search_domain_filter", payload)
+
+        self.client.ask("test", search_domain_filter=["example.com"])
+        payload = json.loads(mock_request.call_args.kwargs["data"])
+        self.assertEqual(payload["search_domain_filter"], ["example.com"])
+
+    @patch('requests.Session.request')
+    def test_ask_uses_reassigned_system_role(self, mock_request):
+        """測試重新指定 system_role 後 ask 會送出新的 system 訊息"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test response"}}]}'
+        mock_request.return_value = mock_response
+
+        self.client.system_role = "new role"
+        self.client.ask("test")
+        payload = json.loads(mock_request.call_args.kwargs["data"])
+        self.assertEqual(payload["messages"][0], {"role": "system", "content": "new role"})
+
     @patch('requests.Session.request')
     def test_ask_method(self, mock_request):
         """測試 ask 方法"""
@@ -77,6 +260,7 @@ class TestPerplexity(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.ok = True
         mock_response.text = '{"choices":[{"message":{"content":"test response"}}]}'
+        mock_response.content = mock_response.text.encode()
         mock_response.json.return_value = {
             "choices": [{"message": {"content": "test response"}}]
         }
@@ -99,14 +283,102 @@ class TestPerplexity(unittest.TestCase):
         raw_response = self.client.ask("test", response_type="raw")
         self.assertEqual(raw_response, mock_response)
 
+        # 測試以列舉指定回應格式
+        enum_response = self.client.ask(
+            "test", response_type=ResponseFormatType.LLM_RESPONSE)
+        self.assertEqual(enum_response, "test response")
+
+    @patch('requests.Session.send')
+    def test_session_carries_auth_header(self, mock_send):
+        """測試認證標頭由 session 提供而非逐次傳入"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test response"}}]}'
+        mock_send.return_value = mock_response
+
+        with patch('requests.Session.request', wraps=self.client._Perplexity__session.request) as mock_request:
+            self.client.ask("test")
+        self.assertIsNone(mock_request.call_args.kwargs.get("headers"))
+        prepared = mock_send.call_args.args[0]
+        self.assertEqual(prepared.headers["Authorization"], f"Bearer {self.api_key}")
+        self.assertEqual(prepared.headers["Content-Type"], "application/json")
+
+    @patch('requests.Session.request')
+    def test_text_response_skips_json_parsing(self, mock_request):
+        """測試只要求文字回應時不解析 JSON"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.text = '{"choices":[{"message":{"content":"test response"}}]}'
+        content = PropertyMock(return_value=mock_response.text.encode())
+        type(mock_response).content = content
+        mock_request.return_value = mock_response
+
+        self.assertEqual(self.client.ask("test", response_type="text"), mock_response.text)
+        content.assert_not_called()
+
+        self.client.ask("test", response_type="text", append_history=True)
+        content.assert_called_once()
+        self.assertEqual(len(self.client.chat_history), 3)
+
+    @patch('requests.Session.request')
+    def test_payload_order(self, mock_request):
+        """測試請求內容以固定前綴開頭且訊息放在最後"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test response"}}]}'
+        mock_request.return_value = mock_response
+
+        self.client.ask("first", temperature=0.5)
+        self.client.ask("second", temperature=0.5)
+        first, second = (json.loads(call.kwargs["data"])
+                         for call in mock_request.call_args_list)
+        self.assertEqual(list(first), ["model", "temperature", "messages"])
+        self.assertEqual(first["messages"][0], second["messages"][0])
+        self.assertEqual(first["messages"][0]["content"], self.system_role)
+        self.assertEqual(second["messages"][-1]["content"], "second")
+
+    @patch('requests.Session.request')
+    def test_ask_uses_instance_config(self, mock_request):
+        """測試 ask 方法套用實例設定並可逐次覆寫"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test response"}}]}'
+        mock_request.return_value = mock_response
+
+        self.client.set_config(temperature=0.5)
+        self.client.ask("test")
+        self.client.ask("test", temperature=0.2, top_p=0.5)
+        first, second = (json.loads(call.kwargs["data"])
+                         for call in mock_request.call_args_list)
+        self.assertEqual(first["temperature"], 0.5)
+        self.assertNotIn("temperature", second)
+        self.assertEqual(second["top_p"], 0.5)
+        self.assertEqual(list(second)[-1], "messages")
+
+    @patch('requests.Session.request')
+    def test_ask_batch_method(self, mock_request):
+        """測試 ask_batch 方法依提示順序回傳回應"""
+        def request(method, url, data=None, **kwargs):
+            prompt = json.loads(data)["messages"][-1]["content"]
+            mock_response = MagicMock()
+            mock_response.ok = True
+            mock_response.content = json.dumps(
+                {"choices": [{"message": {"content": prompt.upper()}}]}).encode()
+            return mock_response
+        mock_request.side_effect = request
+
+        prompts = [f"prompt {i}" for i in range(5)]
+        responses = self.client.ask_batch(prompts, concurrency=3)
+        self.assertEqual(responses, [p.upper() for p in prompts])
+        self.assertEqual(mock_request.call_count, 5)
+        self.assertEqual(len(self.client.chat_history), 1)
+
     @patch('requests.Session.request')
     def test_chat_method(self, mock_request):
         """測試 chat 方法"""
         mock_response = MagicMock()
         mock_response.ok = True
-        mock_response.json.return_value = {
-            "choices": [{"message": {"content": "test chat response"}}]
-        }
+        mock_response.content = b'{"choices":[{"message":{"content":"test chat response"}}]}'
         mock_request.return_value = mock_response
 
         response = self.client.chat("test message")
@@ -114,6 +386,93 @@ class TestPerplexity(unittest.TestCase):
         self.assertEqual(len(self.client.chat_history),
                          3)  # system + user + assistant
         
+    @patch('requests.Session.request')
+    def test_chat_history_window(self, mock_request):
+        """測試聊天紀錄超過上限時只保留最近的訊息"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test chat response"}}]}'
+        mock_request.return_value = mock_response
+
+        self.client.max_history_messages = 4
+        history = self.client.chat_history
+        for i in range(5):
+            self.client.chat(f"message {i}")
+        self.assertIs(self.client.chat_history, history)  # 就地裁切
+        self.assertEqual(len(self.client.chat_history), 5)
+        self.assertEqual(self.client.chat_history[0]["role"], "system")
+        self.assertEqual(self.client.chat_history[1]["content"], "message 3")
+
+        self.client.history_compactor = lambda history: history[:1]
+        self.client.chat("message 5")
+        self.assertEqual(len(self.client.chat_history), 1)
+
+    @patch('requests.Session.request')
+    def test_ask_append_history_window(self, mock_request):
+        """測試以 ask 加入聊天紀錄時同樣只保留最近的訊息"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test response"}}]}'
+        mock_request.return_value = mock_response
+
+        self.client.max_history_messages = 4
+        for i in range(5):
+            self.client.ask(f"message {i}", append_history=True)
+        self.assertEqual(self.client.history_len, 5)
+        self.assertEqual(self.client.chat_history[0]["role"], "system")
+        self.assertEqual(self.client.chat_history[1]["content"], "message 3")
+        self.assertEqual(self.client.chat_history[-1]["content"], "test response")
+
+    @patch('requests.Session.request')
+    def test_chat_history_long_run(self, mock_request):
+        """測試長時間對話時聊天紀錄維持在預設上限內"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.content = b'{"choices":[{"message":{"content":"test chat response"}}]}'
+        mock_request.return_value = mock_response
+
+        for i in range(1000):
+            self.client.chat(f"message {i}")
+        self.assertEqual(self.client.history_len, self.client.max_history_messages + 1)
+        self.assertEqual(self.client.chat_history[0]["role"], "system")
+        self.assertEqual(self.client.chat_history[-2]["content"], "message 999")
+
+    @patch('requests.Session.request')
+    def test_chat_stream_method(self, mock_request):
+        """測試 chat_stream 串流方法"""
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_lines.return_value = [
+            b'data: {"choices":[{"delta":{"content":"test "}}]}',
+            b'',
+            b'data: {"choices":[{"delta":{"content":"stream"}}]}',
+            b'data: [DONE]',
+        ]
+        mock_request.return_value = mock_response
+
+        pieces = list(self.client.chat_stream("test message"))
+        self.assertEqual(pieces, ["test ", "stream"])
+        self.assertTrue(mock_request.call_args.kwargs["stream"])
+        self.assertEqual(len(self.client.chat_history), 3)
+        self.assertEqual(self.client.chat_history[-1]["content"], "test stream")
+
+    def test_chat_stream_error_includes_body(self):
+        """測試 chat_stream 請求失敗時錯誤訊息包含回應內容"""
+        def send(adapter, prepared, **kwargs):
+            raw = urllib3.HTTPResponse(
+                body=io.BytesIO(b'{"error":"bad stream"}'),
+                headers={"Content-Type": "application/json"},
+                status=400,
+                preload_content=False
+            )
+            return adapter.build_response(prepared, raw)
+
+        with patch('requests.adapters.HTTPAdapter.send', autospec=True, side_effect=send):
+            with self.assertRaises(PerplexityConfigError) as context:
+                list(self.client.chat_stream("test message"))
+        self.assertIn("bad stream", str(context.exception))
+
     @patch('requests.Session.request')
     def test_api_error_handling(self, mock_request):
         """測試 API 錯誤處理"""
@@ -147,6 +506,12 @@ class TestPerplexity(unittest.TestCase):
         with self.assertRaises(ValueError):
             ResponseFormatType.validate_response_type("invalid_type")
 
+        # 測試列舉值會轉換為字串
+        self.assertEqual(ResponseFormatType.validate_response_type(
+            ResponseFormatType.JSON), "json")
+        with self.assertRaises(TypeError):
+            ResponseFormatType.validate_response_type(1)
+
 
 if __name__ == '__main__':
     unittest.main(verbosity=2)
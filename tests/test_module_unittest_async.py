@@ -0,0 +1,185 @@
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+import aiohttp
+from perplexity_api_client import AsyncPerplexity
+from perplexity_api_client.exceptions import PerplexityAuthError, PerplexityConfigError, PerplexityAPIError
+
+
+def make_response(content="test response", status=200):
+    """建立模擬的 aiohttp 回應"""
+    response = MagicMock()
+    response.ok = status < 400
+    response.status = status
+    response.text = AsyncMock(return_value=f'{{"content":"{content}"}}')
+    response.json = AsyncMock(return_value={
+        "choices": [{"message": {"content": content}}]
+    })
+    if not response.ok:
+        response.raise_for_status.side_effect = aiohttp.ClientResponseError(
+            MagicMock(), (), status=status)
+    context = MagicMock()
+    context.__aenter__.return_value = response
+    return context
+
+
+def make_stream_response(pieces):
+    """建立模擬的 aiohttp 串流回應"""
+    response = MagicMock()
+    response.ok = True
+    lines = [
+        f'data: {{"choices":[{{"delta":{{"content":"{piece}"}}}}]}}\n'.encode()
+        for piece in pieces
+    ]
+    response.content.__aiter__.return_value = lines + [b"data: [DONE]\n"]
+    context = MagicMock()
+    context.__aenter__.return_value = response
+    return context
+
+
+class TestAsyncPerplexity(unittest.IsolatedAsyncioTestCase):
+    """測試 AsyncPerplexity 非同步客戶端"""
+
+    def setUp(self):
+        """設置測試環境"""
+        self.client = AsyncPerplexity(
+            api_key="test-api-key",
+            model="test-model",
+            system_role="test-role"
+        )
+
+    async def asyncTearDown(self):
+        """清理測試環境"""
+        await self.client.close()
+
+    def test_invalid_initialization(self):
+        """測試無效的初始化參數"""
+        with self.assertRaises(PerplexityAuthError):
+            AsyncPerplexity(api_key="", model="test-model",
+                            system_role="test-role")
+
+    def test_invalid_config(self):
+        """測試無效設定"""
+        with self.assertRaises(PerplexityConfigError):
+            self.client.set_config(invalid_key="value")
+
+    @patch('aiohttp.ClientSession.post')
+    async def test_context_manager(self, mock_post):
+        """測試以 async with 使用客戶端時會關閉連線"""
+        mock_post.return_value = make_response()
+        async with AsyncPerplexity(api_key="test-api-key", model="test-model",
+                                   system_role="test-role") as client:
+            await client.aask("test")
+            session = client._session
+            self.assertFalse(session.closed)
+        self.assertTrue(session.closed)
+        self.assertIsNone(client._session)
+
+    @patch('aiohttp.ClientSession.post')
+    async def test_aask_method(self, mock_post):
+        """測試 aask 方法"""
+        mock_post.return_value = make_response()
+
+        response = await self.client.aask("test")
+        self.assertEqual(response, "test response")
+        self.assertEqual(len(self.client.chat_history), 1)
+
+        json_response = await self.client.aask("test", response_type="json")
+        self.assertEqual(json_response["choices"][0]["message"]["content"],
+                         "test response")
+
+        await self.client.aask("test", append_history=True)
+        self.assertEqual(len(self.client.chat_history), 3)
+
+    @patch('aiohttp.ClientSession.post')
+    async def test_achat_method(self, mock_post):
+        """測試 achat 方法"""
+        mock_post.return_value = make_response("test chat response")
+
+        response = await self.client.achat("test message")
+        self.assertEqual(response, "test chat response")
+        self.assertEqual(len(self.client.chat_history),
+                         3)  # system + user + assistant
+
+    @patch('aiohttp.ClientSession.post')
+    async def test_abatch_method(self, mock_post):
+        """測試 abatch 方法保持順序並限制同時請求數"""
+        in_flight = 0
+        max_in_flight = 0
+
+        def post(url, json):
+            context = make_response(json["messages"][-1]["content"])
+            response = context.__aenter__.return_value
+
+            async def enter(*args):
+                nonlocal in_flight, max_in_flight
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return response
+            context.__aenter__.side_effect = enter
+            return context
+        mock_post.side_effect = post
+
+        messages = [f"message {i}" for i in range(6)]
+        responses = await self.client.abatch(messages, concurrency=2)
+        self.assertEqual(responses, messages)
+        self.assertLessEqual(max_in_flight, 2)
+        self.assertEqual(len(self.client.chat_history), 1)
+
+    @patch('aiohttp.ClientSession.post')
+    async def test_stream_batch_method(self, mock_post):
+        """測試 stream_batch 方法依提示索引回傳串流片段"""
+        def post(url, json, timeout):
+            self.assertTrue(json["stream"])
+            # 串流回應以每次讀取逾時限制，而不是整體逾時
+            self.assertIsNone(timeout.total)
+            self.assertEqual(timeout.sock_read, 60)
+            prompt = json["messages"][-1]["content"]
+            return make_stream_response([prompt, " done"])
+        mock_post.side_effect = post
+
+        prompts = ["a", "b", "c"]
+        received = {idx: "" for idx in range(len(prompts))}
+        async for idx, piece in self.client.stream_batch(prompts, concurrency=2):
+            received[idx] += piece
+        self.assertEqual(received, {0: "a done", 1: "b done", 2: "c done"})
+        self.assertEqual(len(self.client.chat_history), 1)
+
+    @patch('aiohttp.ClientSession.post')
+    async def test_stream_batch_error(self, mock_post):
+        """測試 stream_batch 方法在請求失敗時拋出錯誤"""
+        mock_post.return_value = make_response(status=500)
+
+        with self.assertRaises(PerplexityAPIError):
+            async for _ in self.client.stream_batch(["a", "b"]):
+                pass
+
+    @patch('aiohttp.ClientSession.post')
+    async def test_api_error_handling(self, mock_post):
+        """測試 API 錯誤處理"""
+        mock_post.return_value = make_response(status=400)
+        with self.assertRaises(PerplexityConfigError):
+            await self.client.aask("test")
+
+        mock_post.return_value = make_response(status=401)
+        with self.assertRaises(PerplexityAuthError):
+            await self.client.aask("test")
+
+        mock_post.return_value = make_response(status=429)
+        with self.assertRaises(PerplexityAPIError) as context:
+            await self.client.aask("test")
+        self.assertEqual(context.exception.status_code, 429)
+
+    @patch('aiohttp.ClientSession.post')
+    async def test_connection_error(self, mock_post):
+        """測試連線錯誤"""
+        mock_post.side_effect = aiohttp.ClientConnectionError()
+
+        with self.assertRaises(PerplexityAPIError):
+            await self.client.aask("test")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
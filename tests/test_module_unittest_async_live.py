@@ -0,0 +1,63 @@
+import asyncio
+import os
+import re
+import unittest
+from perplexity_api_client import AsyncPerplexity
+from tests.env_utils import load_env
+
+load_env()
+
+TEST_MODEL = 'llama-3.1-sonar-small-128k-online'
+TEST_ROLE = 'You are a helpful assistant.'
+NONEMPTY = re.compile(r'\S')
+PROMPTS = [
+    "What is Python?",
+    "What is a Python decorator?",
+    "What is a Python generator?",
+    "What is asyncio?",
+]
+
+
+class TestAsyncPerplexityLive(unittest.IsolatedAsyncioTestCase):
+    """實際 API 非同步整合測試"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api_key = os.getenv('PPLX_API_KEY')
+        if not cls.api_key:
+            raise unittest.SkipTest('未設定 API 金鑰')
+
+    async def asyncSetUp(self):
+        self.client = AsyncPerplexity(
+            api_key=self.api_key,
+            model=TEST_MODEL,
+            system_role=TEST_ROLE
+        )
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_live_gather(self):
+        """測試同時送出多個 aask 請求"""
+        responses = await asyncio.gather(*(self.client.aask(p) for p in PROMPTS))
+        self.assertEqual(len(responses), len(PROMPTS))
+        for response in responses:
+            self.assertRegex(response, NONEMPTY)
+        self.assertEqual(len(self.client.chat_history), 1)
+
+    async def test_live_abatch(self):
+        """測試 abatch 方法"""
+        responses = await self.client.abatch(PROMPTS, concurrency=2)
+        self.assertEqual(len(responses), len(PROMPTS))
+        for response in responses:
+            self.assertRegex(response, NONEMPTY)
+
+    async def test_live_achat(self):
+        """測試實際非同步聊天功能"""
+        response = await self.client.achat("What is Python?")
+        self.assertRegex(response, NONEMPTY)
+        self.assertEqual(len(self.client.chat_history), 3)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,139 @@
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, MagicMock
+from perplexity_api_client import Perplexity, LLMCache
+from perplexity_api_client.cache import cache_key
+
+
+class TestLLMCache(unittest.TestCase):
+    """測試 LLMCache 回應快取"""
+
+    def test_cache_key(self):
+        """測試快取鍵只在 temperature 為 0 時產生"""
+        messages = [{"role": "user", "content": "test"}]
+        self.assertIsNone(cache_key("test-model", messages, 0.2))
+        key = cache_key("test-model", messages, 0)
+        self.assertEqual(key, cache_key("test-model", messages, 0.0))
+        self.assertNotEqual(key, cache_key("other-model", messages, 0))
+        self.assertNotEqual(key, cache_key(
+            "test-model", messages, 0, {"top_p": 0.5}))
+
+    def test_lru_eviction(self):
+        """測試最近最少使用的項目會被移除"""
+        cache = LLMCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_shared_backend(self):
+        """測試多個快取共用同一個儲存後端"""
+        backend = {}
+        lock = threading.Lock()
+        first = LLMCache(maxsize=2, backend=backend, lock=lock)
+        second = LLMCache(maxsize=2, backend=backend, lock=lock)
+        first.set("a", 1)
+        first.set("b", 2)
+        self.assertEqual(second.get("a"), 1)
+        second.set("c", 3)
+        self.assertEqual(list(backend), ["a", "c"])
+
+    def test_shared_backend_concurrent(self):
+        """測試多個執行緒同時使用共用後端的快取"""
+        # 縮短執行緒切換間隔，讓沒有共用鎖時的競爭情況容易重現
+        self.addCleanup(sys.setswitchinterval, sys.getswitchinterval())
+        sys.setswitchinterval(1e-6)
+        backend = {}
+        lock = threading.Lock()
+        caches = [LLMCache(maxsize=8, ttl_seconds=0.0001, backend=backend, lock=lock) for _ in range(4)]
+
+        def work(idx):
+            cache = caches[idx % len(caches)]
+            for i in range(2000):
+                key = str((idx + i) % 16)
+                cache.set(key, i)
+                cache.get(key)
+                cache.get(str(i % 16))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for future in [executor.submit(work, idx) for idx in range(8)]:
+                future.result()
+        self.assertLessEqual(len(backend), 8)
+
+    @patch('perplexity_api_client.cache.time.monotonic')
+    def test_ttl_expiry(self, mock_monotonic):
+        """測試過期的項目不會被回傳"""
+        cache = LLMCache(ttl_seconds=10)
+        mock_monotonic.return_value = 100
+        cache.set("a", 1)
+        mock_monotonic.return_value = 105
+        self.assertEqual(cache.get("a"), 1)
+        mock_monotonic.return_value = 111
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 1, "size": 0})
+
+
+class TestPerplexityCache(unittest.TestCase):
+    """測試 Perplexity 客戶端使用快取"""
+
+    def setUp(self):
+        """設置測試環境"""
+        self.client = Perplexity(
+            api_key="test-api-key",
+            model="test-model",
+            system_role="test-role",
+            cache=LLMCache()
+        )
+        self.mock_response = MagicMock()
+        self.mock_response.ok = True
+        self.mock_response.content = b'{"choices":[{"message":{"content":"test response"}}]}'
+
+    def tearDown(self):
+        """清理測試環境"""
+        self.client.close()
+
+    @patch('requests.Session.request')
+    def test_deterministic_ask_is_cached(self, mock_request):
+        """測試 temperature 為 0 時重複的請求只呼叫一次 API"""
+        mock_request.return_value = self.mock_response
+
+        first = self.client.ask("test", temperature=0.0)
+        second = self.client.ask("test", temperature=0.0)
+        self.assertEqual(first, "test response")
+        self.assertEqual(second, "test response")
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertEqual(self.client.cache.stats["hits"], 1)
+
+    @patch('requests.Session.request')
+    def test_invalid_response_is_not_cached(self, mock_request):
+        """測試無法解析的成功回應不會被快取"""
+        invalid_response = MagicMock()
+        invalid_response.ok = True
+        invalid_response.content = b'{"error":"no choices"}'
+        mock_request.return_value = invalid_response
+
+        self.assertIsNone(self.client.ask("test", temperature=0.0))
+        self.assertEqual(len(self.client.cache), 0)
+
+        mock_request.return_value = self.mock_response
+        self.assertEqual(self.client.ask("test", temperature=0.0), "test response")
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('requests.Session.request')
+    def test_sampled_ask_is_not_cached(self, mock_request):
+        """測試 temperature 大於 0 時不使用快取"""
+        mock_request.return_value = self.mock_response
+
+        self.client.ask("test")
+        self.client.ask("test")
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(len(self.client.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -129,6 +129,7 @@ class TestPerplexityErrors(unittest.TestCase):
         mock_response = MagicMock()
         mock_response.ok = True
         mock_response.text = "Invalid JSON"
+        mock_response.content = b"Invalid JSON"
         mock_response.json.side_effect = ValueError()
         mock_request.return_value = mock_response
 
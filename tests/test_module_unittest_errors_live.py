@@ -1,15 +1,15 @@
-import os
+import copy
 import unittest
-from dotenv import load_dotenv
 from perplexity_api_client import Perplexity
 from perplexity_api_client.exceptions import (
     PerplexityConfigError,
     PerplexityAPIError,
     PerplexityAuthError
 )
+from tests.live_client import TEST_MODEL, TEST_ROLE, shared_client
+from tests.env_utils import load_env
 
-TEST_MODEL = 'llama-3.1-sonar-small-128k-online'
-TEST_ROLE = 'You are a helpful assistant.'
+load_env()
 
 
 class TestPerplexityErrorsLive(unittest.TestCase):
@@ -17,83 +17,64 @@ class TestPerplexityErrorsLive(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        """設置測試環境變數"""
-        load_dotenv()
-        cls.valid_api_key = os.getenv('PPLX_API_KEY')
-        if not cls.valid_api_key:
+        """取得共用的客戶端"""
+        # 與其他實際 API 測試模組共用同一個客戶端的連線池，各測試再取得複本以免修改共用的設定
+        cls.shared = shared_client()
+        if cls.shared is None:
             raise unittest.SkipTest('未設定 API 金鑰')
 
+    def setUp(self):
+        # 錯誤情境必須實際呼叫 API，因此複本不使用快取，並還原為預設設定
+        self.client = copy.copy(self.shared)
+        self.client.cache = None
+        self.client.reset_config()
+
     def test_invalid_api_key(self):
         """測試無效的 API 金鑰"""
-        client = Perplexity(
+        with Perplexity(
             api_key="invalid_key_12345",
             model=TEST_MODEL,
             system_role=TEST_ROLE
-        )
-        with self.assertRaises(PerplexityAuthError):
-            client.ask("Hello")
+        ) as client:
+            with self.assertRaises(PerplexityAuthError):
+                client.ask("Hello")
 
     def test_invalid_model(self):
         """測試無效的模型名稱"""
-        client = Perplexity(
-            api_key=self.valid_api_key,
-            model="invalid-model",
-            system_role=TEST_ROLE
-        )
+        self.client.model = "invalid-model"
         with self.assertRaises(PerplexityConfigError):
-            client.ask("Hello")
+            self.client.ask("Hello")
 
     def test_invalid_temperature(self):
         """測試無效的溫度設定"""
-        client = Perplexity(
-            api_key=self.valid_api_key,
-            model=TEST_MODEL,
-            system_role=TEST_ROLE
-        )
         with self.assertRaises(PerplexityConfigError):
-            client.set_config(temperature=2.0)
-            client.chat("Hello")
+            self.client.set_config(temperature=2.0)
+            self.client.chat("Hello")
 
     def test_empty_message(self):
         """測試空訊息"""
-        client = Perplexity(
-            api_key=self.valid_api_key,
-            model="sonar-small-chat",
-            system_role="You are a helpful assistant."
-        )
+        self.client.model = "sonar-small-chat"
         with self.assertRaises(PerplexityConfigError):
-            client.ask("")
+            self.client.ask("")
 
     def test_invalid_top_p(self):
         """測試無效的 top_p 值"""
-        client = Perplexity(
-            api_key=self.valid_api_key,
-            model="sonar-small-chat",
-            system_role="You are a helpful assistant."
-        )
+        self.client.model = "sonar-small-chat"
         with self.assertRaises(PerplexityConfigError):
-            client.set_config(top_p=1.5)
-            client.chat("Hello")
+            self.client.set_config(top_p=1.5)
+            self.client.chat("Hello")
 
     def test_invalid_config_error(self):
         """測試無效設定錯誤"""
-        client = Perplexity(
-            api_key=self.valid_api_key,
-            model="sonar-small-chat",
-            system_role="You are a helpful assistant."
-        )
+        self.client.model = "sonar-small-chat"
         with self.assertRaises(PerplexityConfigError):
-            client.set_config(invalid_key="value")
+            self.client.set_config(invalid_key="value")
 
     def test_invalid_response_type_error(self):
         """測試無效回應類型錯誤"""
-        client = Perplexity(
-            api_key=self.valid_api_key,
-            model="sonar-small-chat",
-            system_role="You are a helpful assistant."
-        )
+        self.client.model = "sonar-small-chat"
         with self.assertRaises(ValueError):
-            client.ask("test", response_type="invalid_type")
+            self.client.ask("test", response_type="invalid_type")
 
 
 if __name__ == '__main__':
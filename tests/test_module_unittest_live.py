@@ -1,10 +1,21 @@
 import os
+import re
 import unittest
-from dotenv import load_dotenv
 from perplexity_api_client import Perplexity
+from tests.live_client import TEST_MODEL, TEST_ROLE, shared_client
+from tests.env_utils import load_env
 
-TEST_MODEL = 'llama-3.1-sonar-small-128k-online'
-TEST_ROLE = 'You are a helpful assistant.'
+# 只在模組匯入時讀取一次 .env，不在每個測試類別重複讀取
+load_env()
+
+# 至少包含一個非空白字元，同時排除只有空白的回應
+NONEMPTY = re.compile(r'\S')
+PROMPTS = [
+    "What is Python?",
+    "What is a Python decorator?",
+    "What is a Python generator?",
+]
+TEST_PROMPT = PROMPTS[0]
 
 
 class TestPerplexityLive(unittest.TestCase):
@@ -12,50 +23,50 @@ class TestPerplexityLive(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        load_dotenv()
-        cls.api_key = os.getenv('PPLX_API_KEY')
-        if not cls.api_key:
+        # 與其他實際 API 測試模組共用同一個客戶端，以重複使用連線池與快取
+        cls.client = shared_client()
+        if cls.client is None:
             raise unittest.SkipTest('未設定 API 金鑰')
+        cls.api_key = os.getenv('PPLX_API_KEY')
+        # 所有提示同時送出，每個提示只請求一次，讓各測試共用回應
+        cls._answers = dict(zip(PROMPTS, cls.client.ask_batch(PROMPTS)))
 
-    def setUp(self):
-        self.client = Perplexity(
-            api_key=self.api_key,
-            model=TEST_MODEL,
-            system_role=TEST_ROLE
-        )
-
-    def tearDown(self):
-        self.client.close()
+    def _reset_history(self):
+        """還原聊天紀錄，只保留 system role"""
+        self.client.chat_history[:] = [self.client.chat_history[0]]
 
     def test_initialization(self):
         """測試初始化"""
         self.assertEqual(self.client.auth_token, self.api_key)
         self.assertEqual(self.client.model, TEST_MODEL)
         self.assertEqual(self.client.system_role, TEST_ROLE)
-        self.assertEqual(len(self.client.chat_history), 1)
-        default_config = Perplexity.default_config
-        default_config.pop('max_tokens')
-        self.assertDictEqual(self.client.config, default_config)
+        self.assertEqual(self.client.history_len, 1)
+        expected = {k: v for k, v in Perplexity.default_config.items()
+                    if k != 'max_tokens'}
+        expected["temperature"] = 0.0
+        self.assertDictEqual(self.client.config, expected)
 
     def test_live_ask(self):
         """測試實際 API 呼叫"""
-        response = self.client.ask("What is Python?")
-        self.assertIsInstance(response, str)
-        self.assertTrue(len(response) > 0)
-        self.assertEqual(len(self.client.chat_history), 1)
+        for prompt in PROMPTS:
+            with self.subTest(prompt=prompt):
+                self.assertRegex(self._answers[prompt], NONEMPTY)
+        self.assertEqual(self.client.history_len, 1)
 
     def test_append_ask(self):
         """Test append user request and llm response using ask method"""
-        response = self.client.ask("What is Python?", append_history=True)
-        self.assertIsInstance(response, str)
-        self.assertTrue(len(response) > 0)
-        self.assertEqual(len(self.client.chat_history), 3)
+        self.addCleanup(self._reset_history)
+        # 與批次請求的內容相同，由快取回應，不再發送第二次請求
+        response = self.client.ask(TEST_PROMPT, append_history=True)
+        self.assertEqual(response, self._answers[TEST_PROMPT])
+        self.assertEqual(self.client.history_len, 3)
+        self.assertEqual(self.client.chat_history[-1]["content"], response)
 
     def test_live_chat(self):
         """測試實際聊天功能"""
-        response = self.client.chat("What is Python?")
-        self.assertIsInstance(response, str)
-        self.assertTrue(len(response) > 0)
+        self.addCleanup(self._reset_history)
+        response = self.client.chat(TEST_PROMPT)
+        self.assertRegex(response, NONEMPTY)
 
 
 if __name__ == '__main__':
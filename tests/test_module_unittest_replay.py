@@ -0,0 +1,100 @@
+import json
+import os
+import unittest
+from unittest.mock import patch
+import requests
+from requests.structures import CaseInsensitiveDict
+from perplexity_api_client import Perplexity
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+TEST_MODEL = 'llama-3.1-sonar-small-128k-online'
+TEST_ROLE = 'You are a helpful assistant.'
+
+
+def load_cassette(name):
+    """讀取錄製好的請求與回應"""
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def replay(cassette):
+    """建立只重播錄製內容的 HTTPAdapter.send 替代函式"""
+    recorded_request = cassette["request"]
+    recorded_response = cassette["response"]
+
+    def send(prepared, **kwargs):
+        body = json.loads(prepared.body)
+        # 比對完整的請求內容與欄位順序，模型、system 訊息或設定改變都不會被重播
+        if (prepared.method != recorded_request["method"]
+                or prepared.url != recorded_request["url"]
+                or list(body.items()) != list(recorded_request["body"].items())):
+            raise AssertionError(f"沒有符合的錄製請求: {prepared.method} {prepared.url}\n{body}")
+        response = requests.Response()
+        response.status_code = recorded_response["status_code"]
+        response.headers = CaseInsensitiveDict(recorded_response["headers"])
+        response._content = json.dumps(recorded_response["body"]).encode()
+        response.encoding = 'utf-8'
+        response.url = prepared.url
+        response.request = prepared
+        return response
+    return send
+
+
+class TestPerplexityReplay(unittest.TestCase):
+    """以錄製的 API 回應重播整合測試，不需要網路"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cassette = load_cassette('ask_python.json')
+        cls.expected = cls.cassette["response"]["body"]["choices"][0]["message"]["content"]
+
+    def setUp(self):
+        self.client = Perplexity(
+            api_key='test-api-key',
+            model=TEST_MODEL,
+            system_role=TEST_ROLE
+        )
+        patcher = patch('requests.adapters.HTTPAdapter.send',
+                        side_effect=replay(self.cassette))
+        self.mock_send = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_replay_ask(self):
+        """測試重播 ask 方法"""
+        response = self.client.ask("What is Python?")
+        self.assertEqual(response, self.expected)
+        self.assertEqual(len(self.client.chat_history), 1)
+        self.mock_send.assert_called_once()
+
+    def test_replay_append_ask(self):
+        """測試重播 ask 方法並加入聊天紀錄"""
+        response = self.client.ask("What is Python?", append_history=True)
+        self.assertEqual(response, self.expected)
+        self.assertEqual(len(self.client.chat_history), 3)
+        self.assertEqual(self.client.chat_history[-1]["content"], self.expected)
+
+    def test_replay_chat(self):
+        """測試重播 chat 方法"""
+        response = self.client.chat("What is Python?")
+        self.assertEqual(response, self.expected)
+        self.assertEqual(len(self.client.chat_history), 3)
+
+    def test_replay_rejects_changed_payload(self):
+        """測試請求內容與錄製不同時不會重播"""
+        with self.assertRaises(AssertionError):
+            self.client.ask("What is Python?", temperature=0.5)
+        with self.assertRaises(AssertionError):
+            self.client.ask("What is Python?", system_role="Be concise.")
+
+    def test_replay_json(self):
+        """測試重播 JSON 回應格式"""
+        response = self.client.ask("What is Python?", response_type="json")
+        self.assertEqual(response, self.cassette["response"]["body"])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)